@@ -4,9 +4,22 @@
 import os
 import re
 import sys
+import json
 import math
-from bs4 import BeautifulSoup
+import multiprocessing
+import pickle
+import tempfile
+import hashlib
+import numpy as np
+from array import array
+from lxml import etree, html as lxml_html
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial, reduce
+from heapq import nlargest
+from itertools import repeat
+from operator import itemgetter
 from urllib.parse import urljoin
 
 # Import NLTK for stopwords
@@ -17,16 +30,144 @@ try:
         nltk.data.find('corpora/stopwords')
     except LookupError:
         nltk.download('stopwords', quiet=True)
-    STOPWORDS = set(stopwords.words('english'))
+    STOPWORDS = frozenset(stopwords.words('english'))
 except ImportError:
     # Fallback stopwords if NLTK not available
-    STOPWORDS = {
+    STOPWORDS = frozenset({
         "a", "an", "the", "and", "or", "but", "is", "are", "was", "were",
         "in", "on", "at", "to", "for", "with", "by", "about", "like",
         "from", "of", "as", "this", "that", "these", "those", "it", "its",
         "be", "been", "being", "have", "has", "had", "do", "does", "did",
         "will", "would", "should", "could", "may", "might", "must", "can"
-    }
+    })
+
+# Pages are always decoded as UTF-8, whatever charset they declare
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+# Tokens are lowercase alphanumeric runs; single chars are dropped by the {2,}.
+# Shared by document parsing and query parsing, compiled once at import.
+TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+# Use Numba for the intersection and scoring kernels if available
+try:
+    from numba import njit, prange
+    from numba.typed import List as NumbaList
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+def _gallop_intersect(a, b):
+    # Intersect two sorted, duplicate-free doc id arrays. Each id of the
+    # shorter array is binary searched in the longer one: O(m log n)
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    idx = np.searchsorted(b, a)
+    idx[idx == len(b)] = len(b) - 1
+    return a[b[idx] == a]
+
+
+if HAVE_NUMBA:
+    @njit(cache=True)
+    def intersect_sorted(a, b):
+        # Two-cursor merge of sorted, duplicate-free doc id arrays
+        out = np.empty(min(len(a), len(b)), dtype=np.int32)
+        i = j = k = 0
+        while i < len(a) and j < len(b):
+            x = a[i]
+            y = b[j]
+            if x == y:
+                out[k] = x
+                k += 1
+            i += x <= y
+            j += y <= x
+        return out[:k]
+    
+    @njit(parallel=True, cache=True)
+    def score_docs(matching, term_postings_list, term_counts_list, inv_doclen, idfs):
+        # Sum TF-IDF over the query terms for each matching doc id
+        scores = np.zeros(len(matching), dtype=np.float64)
+        for k in prange(len(matching)):
+            doc = matching[k]
+            total = 0.0
+            for t in range(len(term_postings_list)):
+                idx = np.searchsorted(term_postings_list[t], doc)
+                total += term_counts_list[t][idx] * inv_doclen[doc] * idfs[t]
+            scores[k] = total
+        return scores
+
+
+@lru_cache(maxsize=1 << 16)
+def _cached_urljoin(base_url, href):
+    # Resolve a link once per (base, href); pages repeat the same links
+    return urljoin(base_url, href)
+
+
+def _extract_hyperlinks(root, base_url=""):
+    # Extract all hyperlinks from HTML. Plain strings, not lxml smart
+    # strings: those reference their element and would keep the whole
+    # tree alive in the urljoin cache and in the returned links.
+    links = set()
+    for href in root.xpath('//a/@href', smart_strings=False):
+        if base_url:
+            full_url = _cached_urljoin(base_url, href)
+        else:
+            full_url = href
+        links.add(full_url)
+    return links
+
+
+def _parse_file(filepath, base_url, stopwords):
+    # Parse one HTML file into (filename, term_counts, doc_length, links).
+    # Touches no engine state and returns only picklable data, so it can
+    # run in a worker process.
+    # Read bytes so pages with an XML encoding declaration still parse
+    with open(filepath, "rb") as file:
+        content = file.read()
+    
+    filename = os.path.basename(filepath)
+    try:
+        root = lxml_html.fromstring(content, parser=HTML_PARSER)
+    except etree.ParserError:
+        # lxml rejects empty documents; index them as zero-term docs
+        return filename, {}, 0, set()
+    except etree.LxmlError as e:
+        # lxml errors hold an error log that cannot be pickled back from a worker
+        raise ValueError(str(e)) from None
+    links = _extract_hyperlinks(root, base_url)
+    
+    # Script and style contents are not page text
+    for el in root.xpath('//script|//style'):
+        el.drop_tree()
+    
+    # Extract and tokenize text. Count every token in C, then drop the
+    # stopwords that actually occur rather than testing each token.
+    text = " ".join(root.itertext()).lower()
+    term_counts = Counter(TOKEN_RE.findall(text))
+    for word in stopwords & term_counts.keys():
+        del term_counts[word]
+    
+    return filename, dict(term_counts), sum(term_counts.values()), links
+
+
+def _try_parse_file(filepath, base_url, stopwords):
+    # _parse_file returning (result, error message) instead of raising, so
+    # one bad file cannot abort an executor.map over the rest
+    try:
+        return _parse_file(filepath, base_url, stopwords), None
+    except FileNotFoundError:
+        return None, f"✗ Error: File not found - {filepath}"
+    except Exception as e:
+        return None, f"✗ Error parsing {os.path.basename(filepath)}: {e}"
+
+
+def _main_is_importable():
+    # Spawned workers re-import the main script; a script read from stdin
+    # has no file to re-import and every worker would die on startup
+    main_file = getattr(sys.modules.get("__main__"), "__file__", None)
+    return main_file is None or os.path.exists(main_file)
 
 
 class SearchEngine:
@@ -35,107 +176,155 @@ class SearchEngine:
     Uses NLTK stopwords and extracts hyperlinks from pages.
     """
     
-    def __init__(self, webpages_dir="webpages"):
+    # Fixed attribute set: no per-instance __dict__
+    __slots__ = (
+        "webpages_dir", "use_cache", "verbose",
+        "inverted_index", "term_frequency", "document_frequency",
+        "document_lengths", "doc_ids", "doc_index", "idf", "inv_doclen",
+        "postings", "tfs", "hyperlinks", "urls", "url_to_id",
+        "stopwords", "documents", "document_urls",
+    )
+    
+    # Starting worker processes costs about half a second, far more than
+    # parsing a typical page (~1 ms), so small corpora are parsed serially
+    PARALLEL_MIN_FILES = 1000
+    PARSE_CHUNKSIZE = 16
+    
+    # Index state persisted by the on-disk cache
+    CACHE_FIELDS = (
+        "documents", "doc_ids", "doc_index", "inverted_index", "term_frequency",
+        "document_frequency", "document_lengths", "idf", "inv_doclen",
+        "hyperlinks", "urls", "url_to_id",
+    )
+    # Bump when parsing or tokenization changes so old caches are ignored
+    CACHE_VERSION = 1
+    CACHE_FILE_RE = re.compile(r"index_[0-9a-f]{40}\.pkl")
+    
+    def __init__(self, webpages_dir="webpages", use_cache=True, verbose=True):
         self.webpages_dir = webpages_dir
+        self.use_cache = use_cache
+        # Progress and per-term info messages; warnings and errors always print
+        self.verbose = verbose
         
-        # Inverted index: maps terms to documents
-        self.inverted_index = defaultdict(set)
-        self.term_frequency = defaultdict(Counter)
-        self.document_frequency = Counter()
-        self.document_lengths = {}
-        
-        # Hyperlinks for web crawler
-        self.hyperlinks = defaultdict(set)
+        self._reset_index()
         
         self.stopwords = STOPWORDS
-        self.documents = []
         self.document_urls = {}
         
         self._load_url_mapping()
     
+    def _reset_index(self):
+        # Start from an empty index; build_index calls this so no state
+        # from a previous build (e.g. a removed file's terms) survives
+        self.documents = []
+        
+        # Inverted index: maps terms to sorted int32 arrays of doc ids,
+        # with term counts held in parallel arrays (same order)
+        self.inverted_index = {}
+        self.term_frequency = {}
+        self.document_frequency = Counter()
+        self.document_lengths = {}
+        
+        # Doc id -> filename (ids are assigned in indexing order) and back
+        self.doc_ids = []
+        self.doc_index = {}
+        
+        # Precomputed after indexing: term -> IDF, doc id -> 1 / doc length
+        self.idf = {}
+        self.inv_doclen = np.zeros(0, dtype=np.float64)
+        
+        # Postings gathered while parsing, as packed C int arrays:
+        # term -> doc ids, and term -> counts in the same order
+        self.postings = defaultdict(partial(array, 'i'))
+        self.tfs = defaultdict(partial(array, 'i'))
+        
+        # Hyperlinks for web crawler: filename -> int32 array of URL ids.
+        # Each distinct URL is stored once in urls; url_to_id is the reverse.
+        self.hyperlinks = {}
+        self.urls = []
+        self.url_to_id = {}
+    
     def _load_url_mapping(self):
         # Load URL mappings from input.txt
         input_file = os.path.join(self.webpages_dir, "input.txt")
         try:
             with open(input_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    # Skip empty lines and comments
-                    if line and not line.startswith("//"):
-                        parts = line.split(" ", 1)  # Split at first space
-                        if len(parts) == 2:
-                            filename, url = parts
-                            self.document_urls[filename] = url
+                data = f.read()
+            
+            # Split each line at the first space; skip empty lines and comments
+            entries = (line.strip().partition(" ") for line in data.splitlines())
+            self.document_urls.update({
+                filename: url
+                for filename, _, url in entries
+                if url and not filename.startswith("//")
+            })
             
-            print(f"✓ Loaded {len(self.document_urls)} URL mappings from input.txt")
+            if self.verbose:
+                print(f"✓ Loaded {len(self.document_urls)} URL mappings from input.txt")
         except FileNotFoundError:
             print(f"⚠ Warning: {input_file} not found. URLs will not be displayed.")
         except Exception as e:
             print(f"⚠ Error loading URL mapping: {e}")
     
-    def _extract_hyperlinks(self, soup, base_url=""):
-        # Extract all hyperlinks from HTML
-        links = set()
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            if base_url:
-                full_url = urljoin(base_url, href)
-            else:
-                full_url = href
-            links.add(full_url)
-        return links
-    
     def parse_document(self, filename):
-        # Parse HTML file and update indexes
+        # Parse one HTML file and add it to the current index
         filepath = os.path.join(self.webpages_dir, filename)
         
-        try:
-            with open(filepath, "r", encoding="utf-8") as file:
-                content = file.read()
-            
-            soup = BeautifulSoup(content, "html.parser")
-            
-            # Extract hyperlinks
-            base_url = self.document_urls.get(filename, "")
-            links = self._extract_hyperlinks(soup, base_url)
-            self.hyperlinks[filename] = links
-            
-            # Extract and tokenize text
-            text = soup.get_text()
-            tokens = re.findall(r'\b\w+\b', text.lower())
-            
-            # Filter stopwords and single chars
-            filtered_tokens = [
-                token for token in tokens
-                if token not in self.stopwords and len(token) > 1
-            ]
-            
-            term_counts = Counter(filtered_tokens)
-            self.document_lengths[filename] = len(filtered_tokens)
-            
-            # Update indexes
-            for term, count in term_counts.items():
-                self.inverted_index[term].add(filename)
-                self.term_frequency[term][filename] = count
-                self.document_frequency[term] += 1
-            
-            print(f"✓ Indexed: {filename} ({len(term_counts)} unique terms, {len(links)} links)")
-            return True
-            
-        except FileNotFoundError:
-            print(f"✗ Error: File not found - {filepath}")
+        if filename in self.documents:
+            print(f"⚠ Warning: {filename} is already indexed.")
             return False
-        except Exception as e:
-            print(f"✗ Error parsing {filename}: {e}")
+        
+        base_url = self.document_urls.get(filename, "")
+        result, error = _try_parse_file(filepath, base_url, self.stopwords)
+        if error:
+            print(error)
             return False
+        
+        self._merge_result(filename, result)
+        self.documents.append(filename)
+        self._rebuild_indexes()
+        return True
+    
+    def _merge_result(self, filename, result):
+        # Add one _parse_file result to the build-time postings and links
+        _, term_counts, doc_length, links = result
+        
+        self.hyperlinks[filename] = np.array(
+            sorted(self._intern_url(url) for url in links), dtype=np.int32
+        )
+        self.document_lengths[filename] = doc_length
+        
+        # Record postings; indexes are rebuilt once in build_index
+        doc_id = len(self.doc_ids)
+        self.doc_ids.append(filename)
+        self.doc_index[filename] = doc_id
+        for term, count in term_counts.items():
+            self.postings[term].append(doc_id)
+            self.tfs[term].append(count)
+        
+        if self.verbose:
+            print(f"✓ Indexed: {filename} ({len(term_counts)} unique terms, {len(links)} links)")
+    
+    def _intern_url(self, url):
+        # Return the id for a URL, assigning the next id on first sight
+        url_id = self.url_to_id.get(url)
+        if url_id is None:
+            url_id = self.url_to_id[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+    
+    def get_links(self, filename):
+        # Outgoing hyperlink URLs of a document
+        return [self.urls[url_id] for url_id in self.hyperlinks.get(filename, ())]
     
     def build_index(self):
         # Build inverted index from all HTML files
-        print(f"\n{'='*60}")
-        print(f"Building Inverted Index from '{self.webpages_dir}'...")
-        print(f"{'='*60}\n")
+        if self.verbose:
+            print(f"\n{'='*60}")
+            print(f"Building Inverted Index from '{self.webpages_dir}'...")
+            print(f"{'='*60}\n")
         
-        self.documents = []
+        self._reset_index()
         
         if not os.path.exists(self.webpages_dir):
             print(f"✗ Error: Directory '{self.webpages_dir}' not found!")
@@ -150,78 +339,244 @@ class SearchEngine:
             print(f"✗ Warning: No HTML files found in '{self.webpages_dir}'")
             return
         
-        for filename in sorted(html_files):
-            if self.parse_document(filename):
-                self.documents.append(filename)
-        
-        print(f"\n{'='*60}")
-        print(f"Indexing Complete!")
-        print(f"{'='*60}")
-        print(f"Documents indexed: {len(self.documents)}")
-        print(f"Unique terms: {len(self.inverted_index)}")
-        print(f"Total hyperlinks: {sum(len(links) for links in self.hyperlinks.values())}")
-        print(f"{'='*60}\n")
+        html_files.sort()
+        cache_path = self._cache_path(html_files) if self.use_cache else None
+        
+        if cache_path and self._load_cached_index(cache_path):
+            if self.verbose:
+                print(f"✓ Loaded cached index: {os.path.basename(cache_path)}")
+        else:
+            # Only cache a complete index; failed files are retried next run
+            if self._parse_all(html_files) and cache_path:
+                self._save_cached_index(cache_path)
+        
+        if self.verbose:
+            print(f"\n{'='*60}")
+            print(f"Indexing Complete!")
+            print(f"{'='*60}")
+            print(f"Documents indexed: {len(self.documents)}")
+            print(f"Unique terms: {len(self.inverted_index)}")
+            print(f"Total hyperlinks: {sum(len(links) for links in self.hyperlinks.values())}")
+            print(f"{'='*60}\n")
+    
+    def _parse_all(self, html_files):
+        # Parse all files and build the index; returns True if every file
+        # was indexed. Results are merged in input order so doc ids (and
+        # hence posting lists) stay sorted.
+        paths = [os.path.join(self.webpages_dir, f) for f in html_files]
+        base_urls = [self.document_urls.get(f, "") for f in html_files]
+        
+        results = None
+        if len(html_files) >= self.PARALLEL_MIN_FILES and _main_is_importable():
+            # Workers are spawned, not forked: forking after the parallel
+            # Numba kernels have started their thread pool deadlocks the child
+            workers = min(os.cpu_count() or 1, len(html_files))
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    results = list(executor.map(
+                        _try_parse_file, paths, base_urls, repeat(self.stopwords),
+                        chunksize=self.PARSE_CHUNKSIZE,
+                    ))
+            except BrokenProcessPool:
+                print("⚠ Warning: Parser worker processes failed; parsing sequentially.")
+        
+        if results is None:
+            results = map(_try_parse_file, paths, base_urls, repeat(self.stopwords))
+        
+        for filename, (result, error) in zip(html_files, results):
+            if error:
+                print(error)
+                continue
+            self._merge_result(filename, result)
+            self.documents.append(filename)
+        
+        self._rebuild_indexes()
+        return len(self.documents) == len(html_files)
+    
+    def _cache_dir(self):
+        # Per-corpus directory under the user cache, outside the corpus itself
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        corpus = os.path.abspath(self.webpages_dir).encode("utf-8")
+        return os.path.join(
+            base, "mini-search-engine", hashlib.sha1(corpus).hexdigest()
+        )
+    
+    def _cache_path(self, html_files):
+        # Cache file name is keyed by the corpus files, their mtimes, the
+        # stopword list, the cache version and the cached fields, so any
+        # change forces a rebuild. Returns None (no caching) if a file
+        # vanishes while being stat'ed.
+        try:
+            inputs = [
+                (f, os.path.getmtime(os.path.join(self.webpages_dir, f)))
+                for f in html_files + ["input.txt"]
+                if os.path.exists(os.path.join(self.webpages_dir, f))
+            ]
+        except OSError:
+            return None
+        key = json.dumps([
+            self.CACHE_VERSION, inputs, sorted(self.stopwords), self.CACHE_FIELDS,
+        ])
+        sig = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self._cache_dir(), f"index_{sig}.pkl")
+    
+    def _load_cached_index(self, cache_path):
+        # Restore index state from cache; returns False if unavailable
+        if not os.path.exists(cache_path):
+            return False
+        try:
+            with open(cache_path, "rb") as f:
+                state = pickle.load(f)
+            # Check everything before assigning anything, so a bad cache
+            # never leaves the engine half loaded
+            missing = [field for field in self.CACHE_FIELDS if field not in state]
+            if missing:
+                raise ValueError(f"missing fields {missing}")
+            for field in self.CACHE_FIELDS:
+                setattr(self, field, state[field])
+            return True
+        except Exception as e:
+            print(f"⚠ Warning: Could not load cached index ({e}). Rebuilding.")
+            return False
+    
+    def _save_cached_index(self, cache_path):
+        # Write index state to cache and drop this corpus's older caches
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            os.makedirs(cache_dir, exist_ok=True)
+            state = {field: getattr(self, field) for field in self.CACHE_FIELDS}
+            # Each run writes its own temp file, then renames it into place
+            tmp = tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".tmp", delete=False)
+            try:
+                with tmp:
+                    pickle.dump(state, tmp, protocol=5)
+                os.replace(tmp.name, cache_path)
+            except BaseException:
+                os.remove(tmp.name)
+                raise
+            for f in os.listdir(cache_dir):
+                path = os.path.join(cache_dir, f)
+                if self.CACHE_FILE_RE.fullmatch(f) and path != cache_path:
+                    os.remove(path)
+        except Exception as e:
+            print(f"⚠ Warning: Could not save index cache: {e}")
+    
+    def _rebuild_indexes(self):
+        # Fold pending postings into the inverted index, then refresh term
+        # and document frequencies. New doc ids are always larger than the
+        # indexed ones, so appending keeps each posting list sorted. Terms
+        # new to the index get zero-copy views over the build-time buffers.
+        for term, ids in self.postings.items():
+            new_ids = np.frombuffer(ids, dtype=np.int32)
+            new_counts = np.frombuffer(self.tfs[term], dtype=np.int32)
+            if term in self.inverted_index:
+                new_ids = np.concatenate((self.inverted_index[term], new_ids))
+                new_counts = np.concatenate((self.term_frequency[term], new_counts))
+            self.inverted_index[term] = new_ids
+            self.term_frequency[term] = new_counts
+            self.document_frequency[term] = len(new_ids)
+        
+        # An exported array('i') can no longer grow, so hand later merges
+        # fresh buffers; the NumPy views keep the old ones alive.
+        self.postings = defaultdict(partial(array, 'i'))
+        self.tfs = defaultdict(partial(array, 'i'))
+        
+        total_docs = len(self.doc_ids)
+        self.idf = {
+            term: math.log(total_docs / df)
+            for term, df in self.document_frequency.items()
+        }
+        lengths = np.array(
+            [self.document_lengths[f] for f in self.doc_ids], dtype=np.float64
+        )
+        self.inv_doclen = np.divide(
+            1.0, lengths, out=np.zeros_like(lengths), where=lengths > 0
+        )
     
     def calculate_tf_idf(self, term, document):
-        # Calculate TF-IDF score
+        # Calculate TF-IDF score of a term in an indexed document (filename)
         # TF = term_count / total_terms, IDF = log(total_docs / docs_with_term)
-        term_count = self.term_frequency[term][document]
-        doc_length = self.document_lengths[document]
-        tf = term_count / doc_length if doc_length > 0 else 0
-        
-        total_docs = len(self.documents)
-        docs_with_term = self.document_frequency[term]
-        idf = math.log(total_docs / docs_with_term) if docs_with_term > 0 else 0
-        
-        return tf * idf
+        if document not in self.doc_index:
+            raise KeyError(f"Document not indexed: {document}")
+        doc_id = self.doc_index[document]
+        postings = self.inverted_index.get(term)
+        if postings is None:
+            return 0.0
+        idx = np.searchsorted(postings, doc_id)
+        if idx == len(postings) or postings[idx] != doc_id:
+            return 0.0
+        term_count = int(self.term_frequency[term][idx])
+        return term_count * float(self.inv_doclen[doc_id]) * self.idf.get(term, 0.0)
     
-    def search(self, query):
-        # Search for documents with ALL query terms (AND logic)
+    def search(self, query, top_k=None):
+        # Search for documents with ALL query terms (AND logic).
+        # If top_k is given, only the k best results are returned.
         if not query.strip():
             print("⚠ Empty query. Please enter some search terms.")
             return []
         
-        query_terms = re.findall(r'\b\w+\b', query.lower())
-        filtered_terms = [
-            term for term in query_terms
-            if term not in self.stopwords and len(term) > 1
-        ]
+        # Tokenize exactly as documents are, so query terms match index terms
+        query_terms = TOKEN_RE.findall(query.lower())
+        filtered_terms = [term for term in query_terms if term not in self.stopwords]
         
         if not filtered_terms:
             print("⚠ Query contains only stopwords. Please use more specific terms.")
             return []
         
-        print(f"\nSearch terms (after filtering): {filtered_terms}")
-        
-        # Find docs with ALL terms using set intersection
-        matching_docs = None
+        if self.verbose:
+            print(f"\nSearch terms (after filtering): {filtered_terms}")
         
         for term in filtered_terms:
             if term in self.inverted_index:
-                if matching_docs is None:
-                    matching_docs = self.inverted_index[term].copy()
-                else:
-                    matching_docs &= self.inverted_index[term]
-                print(f"  '{term}' → found in {len(self.inverted_index[term])} documents")
+                if self.verbose:
+                    print(f"  '{term}' → found in {len(self.inverted_index[term])} documents")
             else:
                 print(f"  '{term}' → NOT FOUND in any document")
                 return []
         
-        if not matching_docs:
+        # Find docs with ALL terms, intersecting each distinct term once,
+        # rarest first. Intersections return new arrays and the posting
+        # arrays are never mutated, so no defensive copy is needed.
+        plans = sorted(
+            dict.fromkeys(filtered_terms), key=self.document_frequency.__getitem__
+        )
+        intersect = intersect_sorted if HAVE_NUMBA else _gallop_intersect
+        matching_docs = reduce(intersect, [self.inverted_index[t] for t in plans])
+        
+        if not len(matching_docs):
             print("\n✗ No documents found matching all query terms.")
             return []
         
         # Rank by TF-IDF scores
-        ranked_results = []
-        for doc in matching_docs:
-            score = sum(
-                self.calculate_tf_idf(term, doc)
-                for term in filtered_terms
-                if term in self.inverted_index
+        if HAVE_NUMBA:
+            idfs = np.array([self.idf[t] for t in filtered_terms], dtype=np.float64)
+            scores = score_docs(
+                matching_docs,
+                NumbaList([self.inverted_index[t] for t in filtered_terms]),
+                NumbaList([self.term_frequency[t] for t in filtered_terms]),
+                self.inv_doclen,
+                idfs,
             )
-            ranked_results.append((doc, score))
+        else:
+            # Score all candidates at once, one vectorized pass per term
+            scores = np.zeros(len(matching_docs), dtype=np.float64)
+            inv_doclen = self.inv_doclen[matching_docs]
+            for term in filtered_terms:
+                idx = np.searchsorted(self.inverted_index[term], matching_docs)
+                scores += self.term_frequency[term][idx] * inv_doclen * self.idf[term]
+        
+        ranked_results = [
+            (self.doc_ids[doc_id], score)
+            for doc_id, score in zip(matching_docs.tolist(), scores.tolist())
+        ]
         
-        ranked_results.sort(key=lambda x: x[1], reverse=True)
+        if top_k is not None:
+            return nlargest(top_k, ranked_results, key=itemgetter(1))
+        ranked_results.sort(key=itemgetter(1), reverse=True)
         return ranked_results
     
     def display_results(self, results):
@@ -243,8 +598,8 @@ class SearchEngine:
             print(f"   URL: {url}")
             
             # Show linked pages if available
-            if doc in self.hyperlinks and self.hyperlinks[doc]:
-                num_links = len(self.hyperlinks[doc])
+            num_links = len(self.hyperlinks.get(doc, ()))
+            if num_links:
                 print(f"   Links: {num_links} outgoing hyperlink(s)")
             
             print()  # Blank line between results
@@ -260,12 +615,9 @@ class SearchEngine:
         print(f"Vocabulary Size: {len(self.inverted_index)} unique terms")
         print(f"Total Hyperlinks: {sum(len(links) for links in self.hyperlinks.values())}")
         
-        # Find most common terms
-        term_doc_counts = [(term, len(docs)) for term, docs in self.inverted_index.items()]
-        term_doc_counts.sort(key=lambda x: x[1], reverse=True)
-        
+        # Find most common terms (document_frequency selects them with a heap)
         print(f"\nTop 10 Most Common Terms:")
-        for i, (term, count) in enumerate(term_doc_counts[:10], 1):
+        for i, (term, count) in enumerate(self.document_frequency.most_common(10), 1):
             print(f"  {i}. '{term}' appears in {count} document(s)")
         
         print(f"{'='*60}\n")
@@ -341,13 +693,15 @@ def main():
         print("\n🧪 Running in TEST mode...")
         print("Output will be saved to output.txt\n")
         
-        engine = SearchEngine()
+        # Keep indexing quiet; search details are part of the test output
+        engine = SearchEngine(verbose=False)
         engine.build_index()
+        engine.verbose = True
         
         output_file = "output.txt"
         original_stdout = sys.stdout
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
             sys.stdout = f
             
             print("="*60)